@@ -13,6 +13,17 @@
 # the License.
 
 """napalm-slx_os package."""
-from napalm_slx_os.slx_os import SLXOSDriver  # noqa
 
 __all__ = ('SLXOSDriver',)
+
+
+def __getattr__(name):
+    # The driver pulls in napalm and netmiko, only import it when it is used
+    if name == 'SLXOSDriver':
+        from napalm_slx_os.slx_os import SLXOSDriver
+        return SLXOSDriver
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(__all__))
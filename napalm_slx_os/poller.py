@@ -0,0 +1,259 @@
+# Copyright 2016 Dravetech AB. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Background BGP state poller for slx_os.
+
+A single BGPPoller keeps one session to a device, refreshes the BGP data on an
+adaptive schedule and serves the latest snapshot from memory to any number of
+readers.
+"""
+import dataclasses
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from napalm.base import models
+
+from napalm_slx_os.slx_os import SLXOSDriver, _BGPData
+
+logger = logging.getLogger(__name__)
+
+# callback(neighbor_address, previous_state, new_state)
+# previous_state is None for new neighbors, new_state is None for removed ones
+StateCallback = Callable[[str, Optional[str], Optional[str]], None]
+
+
+class StaleBGPDataError(RuntimeError):
+    """The latest BGP snapshot is older than the poller's max_age."""
+
+
+@dataclasses.dataclass
+class _BGPSnapshot:
+    data: _BGPData
+    neighbors: Dict[str, models.BGPStateNeighborsPerVRFDict]
+    neighbors_detail: Dict[str, models.PeerDetailsDict]
+    # time.time() for readers, time.monotonic() for the age check
+    polled_at: float
+    polled_at_monotonic: float
+
+
+class BGPPoller:
+    """Poll BGP state of one slx_os device in the background.
+
+    The interval starts at `min_interval` and grows by `backoff` after every
+    poll without state changes, up to `max_interval`. Any peer state transition
+    resets it to `min_interval`, so flapping sessions are followed closely.
+
+    If `max_age` is set, reading a snapshot older than `max_age` seconds raises
+    StaleBGPDataError instead of serving outdated state.
+    """
+
+    def __init__(self, driver: SLXOSDriver, min_interval: float = 10, max_interval: float = 300,
+                 backoff: float = 2.0, max_age: Optional[float] = None):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("0 < min_interval <= max_interval required")
+        if backoff < 1:
+            raise ValueError("backoff must be >= 1")
+
+        self.driver = driver
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.max_age = max_age
+        self.last_error: Optional[Exception] = None
+
+        self._snapshot: Optional[_BGPSnapshot] = None
+        self._callbacks: List[StateCallback] = []
+        self._callbacks_lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        # Taken before _poll_lock is released, so callbacks run in the order snapshots were stored
+        self._notify_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Set when stop() is called from the polling thread, which then closes the session itself
+        self._close_on_exit = False
+
+    def subscribe(self, callback: StateCallback) -> None:
+        with self._callbacks_lock:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: StateCallback) -> None:
+        with self._callbacks_lock:
+            self._callbacks.remove(callback)
+
+    @property
+    def last_polled(self) -> Optional[float]:
+        """Unix time of the latest successful poll, or None if there was none yet."""
+        snapshot = self._snapshot
+        return snapshot.polled_at if snapshot else None
+
+    def get_bgp_neighbors(self) -> Dict[str, models.BGPStateNeighborsPerVRFDict]:
+        """Same as SLXOSDriver.get_bgp_neighbors, served from the latest snapshot.
+
+        The returned dict is shared between readers and must not be modified.
+        """
+        return self._get_snapshot().neighbors
+
+    def get_bgp_neighbors_detail(self) -> Dict[str, models.PeerDetailsDict]:
+        """Same as SLXOSDriver.get_bgp_neighbors_detail, served from the latest snapshot.
+
+        The returned dict is shared between readers and must not be modified.
+        """
+        return self._get_snapshot().neighbors_detail
+
+    def _get_snapshot(self) -> _BGPSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("BGP data has not been polled yet")
+        if self.max_age is not None:
+            age = time.monotonic() - snapshot.polled_at_monotonic
+            if age > self.max_age:
+                raise StaleBGPDataError(
+                    f"BGP data of {self.driver.hostname} is {age:.0f}s old, "
+                    f"last error: {self.last_error!r}")
+        return snapshot
+
+    def poll(self) -> None:
+        """Refresh the BGP data once, notify subscribers and adjust the interval.
+
+        Failures are stored in `last_error`, back off the interval and are raised.
+        """
+        with self._poll_lock:
+            try:
+                data = self.driver._get_bgp_data()
+            except Exception as e:
+                self.last_error = e
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+                raise
+            self.last_error = None
+            previous = self._snapshot
+
+            self._snapshot = _BGPSnapshot(
+                data=data,
+                neighbors=self.driver._bgp_neighbors_from_data(data),
+                neighbors_detail=self.driver._bgp_neighbors_detail_from_data(data),
+                polled_at=time.time(),
+                polled_at_monotonic=time.monotonic(),
+            )
+
+            transitions = _state_transitions(previous.data if previous else None, data)
+            if transitions:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+
+            self._notify_lock.acquire()
+
+        try:
+            for address, old_state, new_state in transitions:
+                self._notify(address, old_state, new_state)
+        finally:
+            self._notify_lock.release()
+
+    def _notify(self, address: str, old_state: Optional[str], new_state: Optional[str]) -> None:
+        with self._callbacks_lock:
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(address, old_state, new_state)
+            except Exception:
+                logger.exception("BGP state callback failed for %s", address)
+
+    def start(self) -> None:
+        """Open the device session and start polling in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("Poller is already running")
+
+        self.driver.open()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"BGPPoller-{self.driver.hostname}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and close the device session.
+
+        Raises TimeoutError if the polling thread did not finish within `timeout`.
+        The poller then stays stopping, and stop() can be called again.
+
+        Called from a subscriber callback, stop() returns immediately and the
+        polling thread closes the session once the callbacks are done.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+
+        self._stop_event.set()
+        if threading.current_thread() is thread:
+            self._close_on_exit = True
+            return
+
+        thread.join(timeout)
+        if thread.is_alive():
+            raise TimeoutError(f"BGPPoller for {self.driver.hostname} is still polling")
+
+        if self._thread is None:
+            # Stopped from a callback, the polling thread already closed the session
+            return
+
+        self._thread = None
+        with self._poll_lock:
+            self.driver.close()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Polling BGP data from %s failed", self.driver.hostname)
+
+            self._stop_event.wait(self.interval)
+
+        if self._close_on_exit:
+            self._close_on_exit = False
+            with self._poll_lock:
+                self.driver.close()
+            self._thread = None
+
+    def __enter__(self) -> 'BGPPoller':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def _state_transitions(previous: Optional[_BGPData], current: _BGPData):
+    """Return (address, old_state, new_state) for every neighbor whose state changed.
+
+    On the first poll every neighbor is reported with old_state None.
+    """
+    old_states = {
+        address: neighbor.state for address, neighbor in previous.neighbor_details.items()
+    } if previous else {}
+    new_states = {
+        address: neighbor.state for address, neighbor in current.neighbor_details.items()
+    }
+
+    transitions = []
+    for address in sorted(old_states.keys() | new_states.keys()):
+        old_state = old_states.get(address)
+        new_state = new_states.get(address)
+        if old_state != new_state:
+            transitions.append((address, old_state, new_state))
+    return transitions
@@ -19,19 +19,40 @@ Napalm driver for slx_os.
 Read https://napalm.readthedocs.io for more information.
 """
 import dataclasses
+import functools
 import ipaddress
 import json
-import re
 import socket
 from collections import defaultdict
-from typing import List, Dict, Union, Any, Optional
+from typing import List, Dict, Union, Any, Optional, TYPE_CHECKING
 
 import napalm.base.helpers
 from napalm.base import NetworkDriver, models
-from napalm.base.exceptions import ConnectionClosedException
-from napalm.base.helpers import textfsm_extractor
+from napalm.base.exceptions import (
+    CommandTimeoutException,
+    ConnectionClosedException,
+    ConnectionException,
+)
 from napalm.base.netmiko_helpers import netmiko_args
-from netmiko import BaseConnection
+from netmiko import ReadTimeout
+
+from napalm_slx_os.utils.circuit_breaker import get_circuit_breaker
+from napalm_slx_os.utils.parsing import (
+    ages_to_seconds,
+    normalize_columns,
+    parse_template,
+    parse_uptime,
+    to_ints,
+    to_optional_ints,
+    uptimes_to_seconds,
+)
+
+if TYPE_CHECKING:
+    from netmiko import BaseConnection
+
+
+class CircuitOpenException(ConnectionException):
+    """The circuit breaker of the host is open, the device is not contacted."""
 
 
 @dataclasses.dataclass
@@ -49,7 +70,7 @@ class _BGPNeighborDetail:
     router_id: str
     vrf: str
     state: str
-    uptime_str: str
+    uptime: int
     keep_alive_time: Optional[int]
     hold_time: Optional[int]
     local_address: Optional[str]
@@ -98,10 +119,6 @@ class _BGPNeighborDetail:
                 + self.messages_received_refresh
         )
 
-    @property
-    def uptime(self) -> int:
-        return _parse_uptime(self.uptime_str)
-
     @property
     def remove_private_as(self) -> bool:
         return self.remove_private_as_str == 'yes'
@@ -112,7 +129,7 @@ class _BGPNeighborSummary:
     address: str
     asn: int
     state: str
-    uptime_str: str
+    uptime: int
     routes_accepted: int
     routes_filtered: int
     routes_sent: int
@@ -127,13 +144,40 @@ NO_SUMMARY = _BGPNeighborSummary(
     address='',
     asn=0,
     state='',
-    uptime_str='',
+    uptime=0,
     routes_accepted=0,
     routes_filtered=0,
     routes_sent=0,
     routes_to_send=0)
 
 
+_BGP_NEIGHBOR_COLUMNS = {
+    'time': uptimes_to_seconds,
+    'keepalivetime': functools.partial(to_optional_ints, empty=0),
+    'holdtime': functools.partial(to_optional_ints, empty=0),
+    'localport': to_optional_ints,
+    'remoteport': to_optional_ints,
+    'msgsentopen': to_ints,
+    'msgsentupdate': to_ints,
+    'msgsentkeepalive': to_ints,
+    'msgsentnotification': to_ints,
+    'msgsentrefresh': to_ints,
+    'msgrecvopen': to_ints,
+    'msgrecvupdate': to_ints,
+    'msgrecvkeepalive': to_ints,
+    'msgrecvnotification': to_ints,
+    'msgrecvrefresh': to_ints,
+}
+
+_BGP_SUMMARY_COLUMNS = {
+    'time': uptimes_to_seconds,
+    'accepted': to_ints,
+    'filtered': to_ints,
+    'sent': to_ints,
+    'tosend': to_ints,
+}
+
+
 @dataclasses.dataclass
 class _BGPData:
     local_router_id: str
@@ -142,29 +186,12 @@ class _BGPData:
     neighbor_summaries: Dict[str, _BGPNeighborSummary]
 
 
-def _parse_uptime(uptime_string: str) -> int:
-    regexes = [
-        (r'(\d+)days', 86400),
-        (r'(\d+)hrs', 3600),
-        (r'(\d+)mins', 60),
-        (r'(\d+)secs', 1),
-    ]
-
-    uptime = 0
-    for regex, multiplier in regexes:
-        match = re.search(regex, uptime_string)
-        if match:
-            uptime += int(match.group(1)) * multiplier
-
-    return uptime
-
-
 class SLXOSDriver(NetworkDriver):
     """Napalm driver for slx_os."""
 
     def __init__(self, hostname, username, password, timeout=60, optional_args=None):
         """Constructor."""
-        self.device: Optional[BaseConnection] = None
+        self.device: Optional['BaseConnection'] = None
         self.hostname = hostname
         self.username = username
         self.password = password
@@ -175,32 +202,89 @@ class SLXOSDriver(NetworkDriver):
 
         self.netmiko_optional_args = netmiko_args(optional_args)
 
+        # Base read timeout per command, extended by the size of the previous output of the
+        # same command at `command_min_throughput` bytes per second
+        self.command_timeout: float = optional_args.get('command_timeout', 10.0)
+        self.command_min_throughput: int = optional_args.get('command_min_throughput', 32768)
+        self.command_retries: int = optional_args.get('command_retries', 1)
+        self._output_sizes: Dict[str, int] = {}
+
+        self.circuit_breaker = get_circuit_breaker(
+            hostname,
+            failure_threshold=optional_args.get('circuit_breaker_threshold', 3),
+            reset_timeout=optional_args.get('circuit_breaker_reset_timeout', 60.0),
+        )
+
         self._candidate_config: Optional[str] = None
         self._config_is_merge: bool = False
 
     def open(self):
         """Open connection to device"""
-        self.device = self._netmiko_open(
-            device_type='extreme_slx',
-            netmiko_optional_args=self.netmiko_optional_args
-        )
+        self._check_circuit_breaker()
+        try:
+            self.device = self._netmiko_open(
+                device_type='extreme_slx',
+                netmiko_optional_args=self.netmiko_optional_args
+            )
+        except ConnectionException:
+            self.circuit_breaker.record_failure()
+            raise
 
     def close(self):
         """Close connection to device"""
         self._netmiko_close()
 
-    def _send_command(self, command: str) -> str:
+    def _check_circuit_breaker(self):
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenException(f"Circuit breaker for {self.hostname} is open")
+
+    def _reconnect(self):
+        try:
+            self.close()
+        except (socket.error, EOFError):
+            pass
+        self.open()
+
+    def _command_read_timeout(self, command: str) -> float:
+        previous_size = self._output_sizes.get(command, 0)
+        return self.command_timeout + previous_size / self.command_min_throughput
+
+    def _send_command(self, command: str, retry: bool = False) -> str:
         """Wrapper for self.device.send.command().
-        If command is a list will iterate through commands until valid command.
+
+        Timeouts and closed connections are counted by the circuit breaker of the host. With
+        `retry`, they are retried up to `command_retries` times on a new connection. A timed
+        out command may still have run, so only read-only commands may be retried.
         """
-        try:
-            output = self.device.send_command(command)
-            return self._send_command_postprocess(output)
-        except (socket.error, EOFError) as e:
-            raise ConnectionClosedException(str(e))
+        read_timeout = self._command_read_timeout(command)
+        attempts = self.command_retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            self._check_circuit_breaker()
+            try:
+                # A previous failed reconnect leaves no device behind
+                if attempt or self.device is None:
+                    self._reconnect()
+                output = self.device.send_command(command, read_timeout=read_timeout)
+            except ReadTimeout:
+                error = CommandTimeoutException(
+                    f"{command!r} timed out after {read_timeout:.0f}s on {self.hostname}")
+                self.circuit_breaker.record_failure()
+            except (socket.error, EOFError) as e:
+                error = ConnectionClosedException(str(e))
+                self.circuit_breaker.record_failure()
+            except ConnectionException as e:
+                # Reconnecting failed, already counted by open()
+                error = e
+            else:
+                self.circuit_breaker.record_success()
+                self._output_sizes[command] = len(output)
+                return self._send_command_postprocess(output)
+
+        raise error
 
     def _send_and_parse_command(self, command: str, template: str):
-        return textfsm_extractor(self, template, self._send_command(command))
+        return parse_template(template, self._send_command(command, retry=True), type(self))
 
     @staticmethod
     def _send_command_postprocess(output):
@@ -232,9 +316,9 @@ class SLXOSDriver(NetworkDriver):
         version_data = self._send_and_parse_command('show version', 'show_version')[0]
         chassis_data = self._send_and_parse_command('show inventory chassis', 'show_inventory_chassis')[0]
 
-        uptime = _parse_uptime(version_data['uptime'])
+        uptime = parse_uptime(version_data['uptime'])
 
-        hostname = self._send_command('show running-config switch-attributes host-name')
+        hostname = self._send_command('show running-config switch-attributes host-name', retry=True)
         hostname = hostname.split('\n')[0].split(' ')[-1].strip()
 
         return {
@@ -258,8 +342,10 @@ class SLXOSDriver(NetworkDriver):
 
         summary_base_data = bgp_summary[0]
 
+        neighbor_rows = normalize_columns(bgp_neighbors + bgp_v6_neighbors, _BGP_NEIGHBOR_COLUMNS)
+
         neighbors_list: List[_BGPNeighborDetail] = []
-        for entry in bgp_neighbors + bgp_v6_neighbors:
+        for entry in neighbor_rows:
             neighbors_list.append(_BGPNeighborDetail(
                 ip_address=napalm.base.helpers.ip(entry['ipaddress']),
                 asn=napalm.base.helpers.as_number(entry['asn']),
@@ -268,42 +354,43 @@ class SLXOSDriver(NetworkDriver):
                 router_id=napalm.base.helpers.ip(entry['routerid']),
                 vrf=entry['vrf'],
                 state=entry['state'],
-                uptime_str=entry['time'],
-                keep_alive_time=int(entry['keepalivetime']) if entry['keepalivetime'] else 0,
-                hold_time=int(entry['holdtime']) if entry['holdtime'] else 0,
+                uptime=entry['time'],
+                keep_alive_time=entry['keepalivetime'],
+                hold_time=entry['holdtime'],
                 local_address=napalm.base.helpers.ip(entry['localaddress']) if entry[
                     'localaddress'] else None,
-                local_port=int(entry['localport']) if entry['localport'] else None,
+                local_port=entry['localport'],
                 remote_address=napalm.base.helpers.ip(entry['remoteaddress']) if entry[
                     'remoteaddress'] else None,
-                remote_port=int(entry['remoteport']) if entry['remoteport'] else None,
+                remote_port=entry['remoteport'],
                 remove_private_as_str=entry['removeprivateas'],
-                messages_sent_open=int(entry['msgsentopen']),
-                messages_sent_update=int(entry['msgsentupdate']),
-                messages_sent_keepalive=int(entry['msgsentkeepalive']),
-                messages_sent_notification=int(entry['msgsentnotification']),
-                messages_sent_refresh=int(entry['msgsentrefresh']),
-                messages_received_open=int(entry['msgrecvopen']),
-                messages_received_update=int(entry['msgrecvupdate']),
-                messages_received_keepalive=int(entry['msgrecvkeepalive']),
-                messages_received_notification=int(entry['msgrecvnotification']),
-                messages_received_refresh=int(entry['msgrecvrefresh']),
+                messages_sent_open=entry['msgsentopen'],
+                messages_sent_update=entry['msgsentupdate'],
+                messages_sent_keepalive=entry['msgsentkeepalive'],
+                messages_sent_notification=entry['msgsentnotification'],
+                messages_sent_refresh=entry['msgsentrefresh'],
+                messages_received_open=entry['msgrecvopen'],
+                messages_received_update=entry['msgrecvupdate'],
+                messages_received_keepalive=entry['msgrecvkeepalive'],
+                messages_received_notification=entry['msgrecvnotification'],
+                messages_received_refresh=entry['msgrecvrefresh'],
             ))
 
-        summary_list: List[_BGPNeighborSummary] = []
-        for entry in bgp_summary + bgp_v6_summary:
-            if not entry['neighboraddress'] or entry['neighboraddress'] == '':
-                continue
+        summary_rows = normalize_columns(
+            [entry for entry in bgp_summary + bgp_v6_summary if entry['neighboraddress']],
+            _BGP_SUMMARY_COLUMNS)
 
+        summary_list: List[_BGPNeighborSummary] = []
+        for entry in summary_rows:
             summary_list.append(_BGPNeighborSummary(
                 address=napalm.base.helpers.ip(entry['neighboraddress']),
                 asn=napalm.base.helpers.as_number(entry['asn']),
                 state=entry['state'],
-                uptime_str=entry['time'],
-                routes_accepted=int(entry['accepted']),
-                routes_filtered=int(entry['filtered']),
-                routes_sent=int(entry['sent']),
-                routes_to_send=int(entry['tosend']),
+                uptime=entry['time'],
+                routes_accepted=entry['accepted'],
+                routes_filtered=entry['filtered'],
+                routes_sent=entry['sent'],
+                routes_to_send=entry['tosend'],
             ))
 
         neighbors_map = {}
@@ -323,11 +410,12 @@ class SLXOSDriver(NetworkDriver):
 
     def get_bgp_neighbors_detail(self, neighbor_address: str = "") -> Dict[str, models.PeerDetailsDict]:
         # TODO: Respect neighbor_address filter
+        return self._bgp_neighbors_detail_from_data(self._get_bgp_data())
 
+    @staticmethod
+    def _bgp_neighbors_detail_from_data(bgp_data: _BGPData) -> Dict[str, models.PeerDetailsDict]:
         bgp_detail = defaultdict(lambda: defaultdict(lambda: []))
 
-        bgp_data = self._get_bgp_data()
-
         for key, neighbor in bgp_data.neighbor_details.items():
             summary_data = bgp_data.neighbor_summaries[
                 neighbor.ip_address] if neighbor.ip_address in bgp_data.neighbor_summaries else NO_SUMMARY
@@ -388,8 +476,11 @@ class SLXOSDriver(NetworkDriver):
         return result_bgp_detail
 
     def get_bgp_neighbors(self) -> Dict[str, models.BGPStateNeighborsPerVRFDict]:
-        bgp_data = self._get_bgp_data()
+        return self._bgp_neighbors_from_data(self._get_bgp_data())
 
+    @staticmethod
+    def _bgp_neighbors_from_data(
+            bgp_data: _BGPData) -> Dict[str, models.BGPStateNeighborsPerVRFDict]:
         output = defaultdict(lambda: {"peers": {}})
 
         # TODO: Fix multi-vrf setup
@@ -469,9 +560,11 @@ class SLXOSDriver(NetworkDriver):
         all_suffix = " all" if full else ""
 
         if retrieve in ("all", "running"):
-            config_data["running"] = self._send_command(f"show running-config{all_suffix}")
+            config_data["running"] = self._send_command(
+                f"show running-config{all_suffix}", retry=True)
         if retrieve in ("all", "startup"):
-            config_data["startup"] = self._send_command(f"show startup-config{all_suffix}")
+            config_data["startup"] = self._send_command(
+                f"show startup-config{all_suffix}", retry=True)
 
         return config_data
 
@@ -491,19 +584,16 @@ class SLXOSDriver(NetworkDriver):
         arp_table: List[models.ARPTableDict] = []
         for vrf_name in vrfs_to_check:
             arp_data = self._send_and_parse_command(f"show arp vrf {vrf_name}", 'show_arp')
+            # convert age from hh:mm:ss to seconds
+            arp_data = normalize_columns(arp_data, {'age': ages_to_seconds})
             for arp_entry in arp_data:
-                # convert age from hh:mm:ss to seconds
-                age = arp_entry['age']
-                age_parts = age.split(':')
-                age_seconds = int(age_parts[0]) * 3600 + int(age_parts[1]) * 60 + int(age_parts[2])
-
                 interface = arp_entry['l2interface'].replace(' ', '') + '|' + arp_entry['l3interface'].replace(' ', '')
 
                 arp_table.append({
                     'interface': interface,
                     'mac': arp_entry['macaddress'],
                     'ip': arp_entry['address'],
-                    'age': age_seconds,
+                    'age': arp_entry['age'],
                 })
 
         return arp_table
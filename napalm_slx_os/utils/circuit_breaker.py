@@ -0,0 +1,116 @@
+# Copyright 2016 Dravetech AB. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Per-host circuit breakers for slx_os.
+
+Breakers are shared by all driver instances talking to the same host, so fleet
+schedulers can read their state with circuit_breaker_states().
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Fail fast after `failure_threshold` consecutive failures.
+
+    Once open, the breaker rejects requests for `reset_timeout` seconds and then
+    goes half open: a single probe is let through, a success closes the breaker
+    again and a failure reopens it. The thread running the probe may make
+    further requests, e.g. to reconnect, while other threads are rejected. A
+    probe that records no result within `reset_timeout` is given up.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_thread: Optional[int] = None
+        self._probe_started: Optional[float] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent, taking the probe when half open."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+
+            now = self._clock()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+
+            thread = threading.get_ident()
+            if (self._probe_started is not None and self._probe_thread != thread
+                    and now - self._probe_started < self.reset_timeout):
+                return False
+
+            if self._probe_thread != thread:
+                self._probe_thread = thread
+                self._probe_started = now
+            return True
+
+    def _clear_probe(self) -> None:
+        self._probe_thread = None
+        self._probe_started = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._clear_probe()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._clear_probe()
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self._clock()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(hostname: str, failure_threshold: int = 3,
+                        reset_timeout: float = 60.0) -> CircuitBreaker:
+    """Return the breaker for `hostname`, creating it on first use.
+
+    The settings only apply when the breaker is created.
+    """
+    with _breakers_lock:
+        if hostname not in _breakers:
+            _breakers[hostname] = CircuitBreaker(failure_threshold, reset_timeout)
+        return _breakers[hostname]
+
+
+def circuit_breaker_states() -> Dict[str, str]:
+    """Return the breaker state of every host seen by this process."""
+    with _breakers_lock:
+        return {hostname: breaker.state for hostname, breaker in _breakers.items()}
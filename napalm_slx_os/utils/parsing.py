@@ -0,0 +1,164 @@
+# Copyright 2016 Dravetech AB. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Parsing helpers for slx_os.
+
+This module must stay cheap to import: it is used on its own by tools that only
+parse CLI output. Do not import napalm, netmiko or textfsm at module level here.
+"""
+import functools
+import os
+import re
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'textfsm_templates')
+
+
+def _template_dirs(driver_class: Optional[type]) -> List[str]:
+    """Template directories to search, following the MRO of `driver_class` like
+    napalm.base.helpers.textfsm_extractor, so subclasses can override templates.
+    """
+    template_dirs = []
+    for c in (driver_class.__mro__ if driver_class is not None else ()):
+        module_file = getattr(sys.modules.get(c.__module__), '__file__', None)
+        if c is object or not module_file:
+            continue
+        template_dir = os.path.join(
+            os.path.dirname(os.path.abspath(module_file)), 'utils', 'textfsm_templates')
+        if template_dir not in template_dirs:
+            template_dirs.append(template_dir)
+
+    if TEMPLATE_DIR not in template_dirs:
+        template_dirs.append(TEMPLATE_DIR)
+    return template_dirs
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(template_name: str,
+                 driver_class: Optional[type] = None) -> Tuple[Any, threading.Lock]:
+    """Return the compiled TextFSM template `template_name` and its lock.
+
+    The template is looked up in the MRO of `driver_class` first, then in this
+    package. Templates are compiled on first use and kept for the lifetime of
+    the process. A compiled template keeps per-parse state, so it must only be
+    used while holding its lock.
+    """
+    import textfsm
+
+    template_dirs = _template_dirs(driver_class)
+    for template_dir in template_dirs:
+        template_path = os.path.join(template_dir, f'{template_name}.tpl')
+        if not os.path.exists(template_path):
+            continue
+        try:
+            with open(template_path) as f:
+                return textfsm.TextFSM(f), threading.Lock()
+        except textfsm.TextFSMTemplateError as e:
+            from napalm.base.exceptions import TemplateRenderException
+            raise TemplateRenderException(f"Wrong format of TextFSM template {template_name}: {e}")
+
+    from napalm.base.exceptions import TemplateNotImplemented
+    raise TemplateNotImplemented(
+        f"TextFSM template {template_name}.tpl is not defined under {', '.join(template_dirs)}")
+
+
+def parse_template(template_name: str, raw_text: str,
+                   driver_class: Optional[type] = None) -> List[Dict[str, str]]:
+    """Apply the TextFSM template `template_name` to `raw_text`.
+
+    Returns the same table as napalm.base.helpers.textfsm_extractor, a list of
+    dicts keyed by the lowercased template value names.
+    """
+    fsm, lock = get_template(template_name, driver_class)
+    with lock:
+        fsm.Reset()
+        rows = fsm.ParseText(raw_text)
+        header = [name.lower() for name in fsm.header]
+
+    return [dict(zip(header, row)) for row in rows]
+
+
+# Matches both "295days 13hrs 15mins 5secs" (show version) and "1y13d15h52m49s" (show bgp)
+_UPTIME_RE = re.compile(
+    r'\s*(?:(\d+)y)?\s*(?:(\d+)(?:days|d))?\s*(?:(\d+)(?:hrs|h))?'
+    r'\s*(?:(\d+)(?:mins|m))?\s*(?:(\d+)(?:secs|s))?\s*'
+)
+_UPTIME_MULTIPLIERS = (31536000, 86400, 3600, 60, 1)
+
+_AGE_RE = re.compile(r'(\d+):(\d+):(\d+)')
+
+
+def uptimes_to_seconds(values: Iterable[str]) -> List[int]:
+    """Convert uptime strings to seconds, empty strings become 0."""
+    match = _UPTIME_RE.fullmatch
+    result = []
+    for value in values:
+        groups = match(value)
+        if groups is None:
+            raise ValueError(f"Invalid uptime {value!r}")
+        result.append(sum(
+            int(group) * multiplier
+            for group, multiplier in zip(groups.groups(), _UPTIME_MULTIPLIERS) if group
+        ))
+    return result
+
+
+def ages_to_seconds(values: Iterable[str]) -> List[int]:
+    """Convert hh:mm:ss ages to seconds."""
+    match = _AGE_RE.fullmatch
+    result = []
+    for value in values:
+        groups = match(value)
+        if groups is None:
+            raise ValueError(f"Invalid age {value!r}")
+        hours, minutes, seconds = groups.groups()
+        result.append(int(hours) * 3600 + int(minutes) * 60 + int(seconds))
+    return result
+
+
+def to_ints(values: Iterable[str]) -> List[int]:
+    """Convert counters to int, empty strings are rejected."""
+    return [int(value) for value in values]
+
+
+def to_optional_ints(values: Iterable[str], empty: Optional[int] = None) -> List[Optional[int]]:
+    """Convert counters to int, empty strings become `empty`."""
+    return [int(value) if value else empty for value in values]
+
+
+def normalize_columns(
+        rows: List[Dict[str, Any]],
+        converters: Dict[str, Callable[[List[str]], List[Any]]],
+) -> List[Dict[str, Any]]:
+    """Convert whole columns of parsed rows in place.
+
+    `converters` maps a column name to a function taking all values of that
+    column and returning the converted values in the same order. Converters
+    raise ValueError on malformed input.
+    """
+    for column, convert in converters.items():
+        values = convert([row[column] for row in rows])
+        if len(values) != len(rows):
+            raise ValueError(
+                f"Converter for {column!r} returned {len(values)} values for {len(rows)} rows")
+        for row, value in zip(rows, values):
+            row[column] = value
+    return rows
+
+
+def parse_uptime(uptime_string: str) -> int:
+    return uptimes_to_seconds([uptime_string])[0]
@@ -8,6 +8,7 @@ from napalm.base.test import conftest as parent_conftest
 from napalm.base.test.double import BaseTestDouble
 
 from napalm_slx_os import slx_os
+from napalm_slx_os.utils.circuit_breaker import CircuitBreaker
 
 
 @pytest.fixture(scope='class')
@@ -37,6 +38,8 @@ class PatchedSLXOSDriver(slx_os.SLXOSDriver):
 
         self.patched_attrs = ['device']
         self.device = FakeSLXOSDevice()
+        # Missing mocked data raises IOError, which must not open the breaker shared by all tests
+        self.circuit_breaker = CircuitBreaker(failure_threshold=float('inf'))
 
     def open(self):
         pass
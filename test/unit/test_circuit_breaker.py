@@ -0,0 +1,195 @@
+"""Tests for command retries and the circuit breaker."""
+
+import threading
+
+import pytest
+from napalm.base.exceptions import CommandTimeoutException, ConnectionException
+from netmiko import ReadTimeout
+
+from napalm_slx_os import slx_os
+from napalm_slx_os.utils import circuit_breaker
+from napalm_slx_os.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def breakers():
+    """Start and leave every test with an empty breaker registry."""
+    circuit_breaker._breakers.clear()
+    yield
+    circuit_breaker._breakers.clear()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWedgedDevice:
+    """Device that times out `timeouts` times before answering."""
+
+    def __init__(self, timeouts):
+        self.timeouts = timeouts
+        self.read_timeouts = []
+
+    def send_command(self, command, read_timeout=10.0, **kwargs):
+        self.read_timeouts.append(read_timeout)
+        if self.timeouts:
+            self.timeouts -= 1
+            raise ReadTimeout()
+        return 'x' * 65536
+
+
+class ReconnectingSLXOSDriver(slx_os.SLXOSDriver):
+    """Driver whose open() only counts reconnects."""
+
+    def __init__(self, hostname, device, optional_args=None):
+        super().__init__(hostname, 'vagrant', 'vagrant', optional_args=optional_args)
+        self.device = device
+        self.opened = 0
+
+    def open(self):
+        self._check_circuit_breaker()
+        self.opened += 1
+
+    def close(self):
+        pass
+
+
+class FlakyConnectSLXOSDriver(slx_os.SLXOSDriver):
+    """Driver whose connection attempts fail while `connect_failures` is non zero."""
+
+    def __init__(self, hostname, device, connect_failures):
+        super().__init__(hostname, 'vagrant', 'vagrant')
+        self.device = device
+        self.fake_device = device
+        self.connect_failures = connect_failures
+
+    def _netmiko_open(self, device_type, netmiko_optional_args=None):
+        if self.connect_failures:
+            self.connect_failures -= 1
+            raise ConnectionException('Cannot connect')
+        self._netmiko_device = self.fake_device
+        return self.fake_device
+
+
+def test_breaker_state_machine():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+
+    clock.now = 30
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+
+    clock.now = 60
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.failures == 0
+
+
+def _allow_request_in_other_thread(breaker):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(breaker.allow_request()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_breaker_half_open_allows_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    clock.now = 30
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert not _allow_request_in_other_thread(breaker)
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    # A probe that never records a result is given up after reset_timeout
+    clock.now = 60
+    assert breaker.allow_request()
+    clock.now = 90
+    assert _allow_request_in_other_thread(breaker)
+
+    breaker.record_success()
+    assert _allow_request_in_other_thread(breaker)
+
+
+def test_breaker_is_shared_per_host():
+    first = slx_os.SLXOSDriver('shared.example.net', 'vagrant', 'vagrant')
+    second = slx_os.SLXOSDriver('shared.example.net', 'vagrant', 'vagrant')
+
+    assert first.circuit_breaker is second.circuit_breaker
+    assert circuit_breaker.circuit_breaker_states()['shared.example.net'] == circuit_breaker.CLOSED
+
+
+def test_retry_with_reconnect():
+    device = FakeWedgedDevice(timeouts=1)
+    driver = ReconnectingSLXOSDriver('retry.example.net', device)
+
+    assert driver.get_config(retrieve='running')['running'] == 'x' * 65536
+    assert driver.opened == 1
+    assert driver.circuit_breaker.state == circuit_breaker.CLOSED
+
+
+def test_read_timeout_scales_with_output_size():
+    device = FakeWedgedDevice(timeouts=0)
+    driver = ReconnectingSLXOSDriver('scale.example.net', device, optional_args={
+        'command_timeout': 5,
+        'command_min_throughput': 32768,
+    })
+
+    driver.cli(['show running-config', 'show running-config'])
+
+    assert device.read_timeouts == [5, 7]
+
+
+def test_breaker_fails_fast():
+    device = FakeWedgedDevice(timeouts=4)
+    driver = ReconnectingSLXOSDriver('wedged.example.net', device, optional_args={
+        'command_retries': 1,
+        'circuit_breaker_threshold': 3,
+    })
+
+    with pytest.raises(CommandTimeoutException):
+        driver.get_config(retrieve='running')
+    with pytest.raises(slx_os.CircuitOpenException):
+        driver.get_config(retrieve='running')
+
+    assert len(device.read_timeouts) == 3
+    assert circuit_breaker.circuit_breaker_states()['wedged.example.net'] == circuit_breaker.OPEN
+
+
+def test_failed_reconnect_recovers():
+    device = FakeWedgedDevice(timeouts=1)
+    driver = FlakyConnectSLXOSDriver('reconnect.example.net', device, connect_failures=1)
+
+    with pytest.raises(ConnectionException):
+        driver.get_config(retrieve='running')
+    assert driver.device is None
+
+    assert driver.get_config(retrieve='running')['running'] == 'x' * 65536
+    assert driver.device is device
+
+
+def test_cli_is_not_retried():
+    device = FakeWedgedDevice(timeouts=1)
+    driver = ReconnectingSLXOSDriver('cli.example.net', device)
+
+    with pytest.raises(CommandTimeoutException):
+        driver.cli(['clear ip bgp neighbor all'])
+
+    assert len(device.read_timeouts) == 1
+    assert driver.opened == 0
@@ -0,0 +1,44 @@
+"""Tests for the import time of the parsing helpers."""
+
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time budget for napalm_slx_os.utils.parsing, in microseconds
+IMPORT_TIME_BUDGET_US = 50000
+
+HEAVY_MODULES = ('napalm', 'netmiko', 'paramiko', 'textfsm')
+
+
+def _importtime(statement):
+    """Return {module: cumulative_us} as reported by `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True,
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize('statement', [
+    'import napalm_slx_os',
+    'import napalm_slx_os.utils.parsing',
+])
+def test_no_heavy_imports(statement):
+    modules = _importtime(statement)
+
+    for name in modules:
+        assert name.split('.')[0] not in HEAVY_MODULES, f'{statement!r} imported {name}'
+
+
+def test_parsing_import_time_budget():
+    modules = _importtime('import napalm_slx_os.utils.parsing')
+
+    assert modules['napalm_slx_os.utils.parsing'] < IMPORT_TIME_BUDGET_US
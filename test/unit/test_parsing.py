@@ -0,0 +1,79 @@
+"""Tests for the parsing helpers."""
+
+import sys
+import types
+
+import pytest
+
+from napalm_slx_os.slx_os import SLXOSDriver
+from napalm_slx_os.utils import parsing
+
+
+@pytest.mark.parametrize('uptime, expected', [
+    ('295days 13hrs 15mins 5secs', 25535705),
+    ('13d15h52m49s', 1180369),
+    ('325d12h17m', 28124220),
+    ('1y2d', 31708800),
+    ('', 0),
+])
+def test_uptimes_to_seconds(uptime, expected):
+    assert parsing.uptimes_to_seconds([uptime]) == [expected]
+
+
+@pytest.mark.parametrize('converter, value', [
+    (parsing.uptimes_to_seconds, '13 days'),
+    (parsing.ages_to_seconds, '00:01'),
+    (parsing.to_ints, ''),
+])
+def test_invalid_values(converter, value):
+    with pytest.raises(ValueError):
+        converter([value])
+
+
+def test_normalize_columns():
+    rows = [
+        {'age': '00:01:02', 'port': '179', 'name': 'a'},
+        {'age': '01:00:00', 'port': '', 'name': 'b'},
+    ]
+
+    result = parsing.normalize_columns(rows, {
+        'age': parsing.ages_to_seconds,
+        'port': parsing.to_optional_ints,
+    })
+
+    assert result == [
+        {'age': 62, 'port': 179, 'name': 'a'},
+        {'age': 3600, 'port': None, 'name': 'b'},
+    ]
+
+
+def test_templates_have_own_lock():
+    fsm, lock = parsing.get_template('show_arp')
+    other_fsm, other_lock = parsing.get_template('show_vrf')
+
+    assert parsing.get_template('show_arp') == (fsm, lock)
+    assert lock is not other_lock
+
+
+def test_normalize_columns_rejects_short_converter():
+    rows = [{'port': '179'}, {'port': '22'}]
+
+    with pytest.raises(ValueError):
+        parsing.normalize_columns(rows, {'port': lambda values: [int(values[0])]})
+
+
+def test_subclass_overrides_template(tmp_path, monkeypatch):
+    template_dir = tmp_path / 'utils' / 'textfsm_templates'
+    template_dir.mkdir(parents=True)
+    (template_dir / 'show_vrf.tpl').write_text(
+        'Value Name (\\S+)\n\nStart\n  ^VRF ${Name} -> Record\n')
+
+    module = types.ModuleType('custom_slx_os')
+    module.__file__ = str(tmp_path / 'custom_slx_os.py')
+    monkeypatch.setitem(sys.modules, 'custom_slx_os', module)
+    CustomDriver = type('CustomDriver', (SLXOSDriver,), {'__module__': 'custom_slx_os'})
+
+    assert parsing.parse_template('show_vrf', 'VRF blue', CustomDriver) == [{'name': 'blue'}]
+    # Templates the subclass does not override still come from this package
+    assert parsing.get_template('show_arp', CustomDriver)[0].header == \
+        parsing.get_template('show_arp')[0].header
@@ -0,0 +1,199 @@
+"""Tests for the background BGP poller."""
+
+import dataclasses
+import threading
+import time
+
+import pytest
+
+from conftest import PatchedSLXOSDriver
+from napalm_slx_os.poller import BGPPoller, StaleBGPDataError
+
+PEER = '80.249.208.82'
+
+
+@pytest.fixture
+def driver():
+    driver = PatchedSLXOSDriver('127.0.0.1', 'vagrant', 'vagrant')
+    driver.device.current_test = 'test_get_bgp_neighbors'
+    driver.device.current_test_case = 'single_ebgp'
+    return driver
+
+
+def _set_state(driver, state):
+    """Make the next polls report `state` for PEER."""
+    get_bgp_data = driver._get_bgp_data
+
+    def patched():
+        data = get_bgp_data()
+        data.neighbor_details[PEER] = dataclasses.replace(data.neighbor_details[PEER], state=state)
+        return data
+
+    driver._get_bgp_data = patched
+
+
+def test_serves_latest_snapshot(driver):
+    poller = BGPPoller(driver)
+
+    with pytest.raises(RuntimeError):
+        poller.get_bgp_neighbors()
+
+    poller.poll()
+
+    assert poller.get_bgp_neighbors() == driver.get_bgp_neighbors()
+    assert poller.get_bgp_neighbors() == driver.device.expected_result
+    assert poller.get_bgp_neighbors_detail() == driver.get_bgp_neighbors_detail()
+    assert poller.last_polled is not None
+
+
+def test_state_transitions_and_adaptive_interval(driver):
+    poller = BGPPoller(driver, min_interval=10, max_interval=30, backoff=2)
+    transitions = []
+    poller.subscribe(lambda *args: transitions.append(args))
+
+    poller.poll()
+    assert transitions == [(PEER, None, 'ESTABLISHED')]
+    assert poller.interval == 10
+
+    poller.poll()
+    poller.poll()
+    assert len(transitions) == 1
+    assert poller.interval == 30
+
+    _set_state(driver, 'IDLE')
+    poller.poll()
+    assert transitions[-1] == (PEER, 'ESTABLISHED', 'IDLE')
+    assert poller.interval == 10
+    assert poller.get_bgp_neighbors()['global']['peers'][PEER]['is_up'] is False
+
+
+def test_overlapping_polls_notify_in_order(driver):
+    poller = BGPPoller(driver)
+    poller.poll()
+
+    get_bgp_data = driver._get_bgp_data
+    states = ['IDLE', 'ESTABLISHED']
+    second_polled = threading.Event()
+
+    def next_state():
+        data = get_bgp_data()
+        state = states.pop(0)
+        data.neighbor_details[PEER] = dataclasses.replace(data.neighbor_details[PEER], state=state)
+        if not states:
+            second_polled.set()
+        return data
+
+    driver._get_bgp_data = next_state
+
+    transitions = []
+    second_poll = threading.Thread(target=poller.poll)
+
+    def on_change(address, old_state, new_state):
+        if not transitions:
+            # Let the second poll store its snapshot while this callback is running
+            second_poll.start()
+            assert second_polled.wait(5)
+            second_poll.join(0.1)
+        transitions.append((old_state, new_state))
+
+    poller.subscribe(on_change)
+    poller.poll()
+    second_poll.join(5)
+
+    assert transitions == [('ESTABLISHED', 'IDLE'), ('IDLE', 'ESTABLISHED')]
+    assert poller.get_bgp_neighbors()['global']['peers'][PEER]['is_up'] is True
+
+
+def test_failing_callback_does_not_break_poll(driver):
+    poller = BGPPoller(driver)
+    transitions = []
+
+    def failing(*args):
+        raise ValueError()
+
+    poller.subscribe(failing)
+    poller.subscribe(lambda *args: transitions.append(args))
+    poller.poll()
+
+    assert transitions == [(PEER, None, 'ESTABLISHED')]
+
+
+def test_background_thread(driver):
+    polled = threading.Event()
+    poller = BGPPoller(driver, min_interval=0.01, max_interval=0.01)
+    poller.subscribe(lambda *args: polled.set())
+
+    with poller:
+        assert polled.wait(5)
+
+    assert poller.last_polled is not None
+
+
+def test_stop_timeout_keeps_session(driver):
+    polling = threading.Event()
+    release = threading.Event()
+    closed = []
+
+    def blocking():
+        polling.set()
+        release.wait(5)
+        raise ValueError()
+
+    driver._get_bgp_data = blocking
+    driver.close = lambda: closed.append(True)
+    poller = BGPPoller(driver)
+    poller.start()
+    assert polling.wait(5)
+
+    with pytest.raises(TimeoutError):
+        poller.stop(timeout=0.01)
+    assert closed == []
+    with pytest.raises(RuntimeError):
+        poller.start()
+
+    release.set()
+    poller.stop(timeout=5)
+    assert closed == [True]
+
+
+def test_stop_from_callback(driver):
+    closed = threading.Event()
+    driver.close = closed.set
+    poller = BGPPoller(driver, min_interval=0.01, max_interval=0.01)
+    poller.subscribe(lambda *args: poller.stop())
+
+    poller.start()
+
+    assert closed.wait(5)
+    poller.stop(timeout=5)
+    poller.start()
+    poller.stop(timeout=5)
+
+
+def test_failed_poll_and_max_age(driver, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    poller = BGPPoller(driver, min_interval=10, max_interval=30, max_age=60)
+    poller.poll()
+
+    def failing():
+        raise ConnectionError('device is gone')
+
+    driver._get_bgp_data = failing
+    with pytest.raises(ConnectionError):
+        poller.poll()
+
+    assert isinstance(poller.last_error, ConnectionError)
+    assert poller.interval == 20
+    assert poller.get_bgp_neighbors()['global']['peers'][PEER]['is_up'] is True
+
+    now[0] += 61
+    with pytest.raises(StaleBGPDataError):
+        poller.get_bgp_neighbors()
+
+
+def test_invalid_intervals(driver):
+    with pytest.raises(ValueError):
+        BGPPoller(driver, min_interval=10, max_interval=5)
+    with pytest.raises(ValueError):
+        BGPPoller(driver, backoff=0.5)